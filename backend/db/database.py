@@ -1,31 +1,158 @@
 import sqlite3
-import json
+import queue
+from contextlib import contextmanager
 from datetime import datetime
 
+import orjson
+
 
 DB_NAME = "tickets.db"
+POOL_SIZE = 4
+POOL_TIMEOUT = 5
+FETCH_SIZE = 1000
+_MAX_ROWID = 2 ** 63 - 1
+
+_INSERT_SQL = """
+    INSERT INTO tickets (
+        game_type,
+        draw_date,
+        numbers,
+        numbers_mask,
+        numbers_text,
+        is_system_bet,
+        prize_results,
+        is_winner,
+        created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_HISTORY_SQL = """
+    SELECT
+        id,
+        game_type,
+        draw_date,
+        numbers,
+        numbers_mask,
+        numbers_text,
+        is_system_bet,
+        prize_results,
+        is_winner,
+        created_at
+    FROM tickets
+    WHERE id < ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+_UTCNOW = datetime.utcnow
+
+# Connections are opened once in init_db() and handed out by get_conn(),
+# so each request reuses a configured connection with a warm page cache.
+_POOL = queue.Queue(maxsize=POOL_SIZE)
+
+
+def _dumps(value):
+    # prize_results uses int tier keys (3..6), which orjson rejects by default
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _loads(value):
+    return orjson.loads(value)
+
+
+# Ticket numbers are stored compactly instead of as JSON:
+# - TOTO numbers (1..49, no duplicates) as an INTEGER bitmask with bit n set
+#   for number n, the same encoding ResultChecker uses; read back in
+#   ascending order
+# - 4D numbers as comma-joined text in numbers_text
+# Anything else, and rows saved before these columns existed, use the JSON
+# `numbers` column.
+def _encode_numbers(ticket):
+    """
+    Return the (numbers, numbers_mask, numbers_text) column values.
+    """
+    numbers = ticket.numbers
+
+    if ticket.game_type == "TOTO" and all(
+        isinstance(n, int) and 1 <= n <= 49 for n in numbers
+    ):
+        mask = 0
+        for n in numbers:
+            mask |= 1 << n
+        return None, mask, None
+
+    if ticket.game_type == "4D" and all(
+        isinstance(n, str) and "," not in n for n in numbers
+    ):
+        return None, None, ",".join(numbers)
+
+    return _dumps(numbers), None, None
+
+
+def _decode_numbers(row):
+    mask = row["numbers_mask"]
+    if mask is not None:
+        numbers = []
+        while mask:
+            bit = mask & -mask
+            numbers.append(bit.bit_length() - 1)
+            mask ^= bit
+        return numbers
+
+    if row["numbers_text"] is not None:
+        return row["numbers_text"].split(",")
+
+    return _loads(row["numbers"])
 
 
 def get_connection():
-    return sqlite3.connect(
+    conn = sqlite3.connect(
         DB_NAME,
         timeout=5,
         check_same_thread=False
     )
+    conn.row_factory = sqlite3.Row
+
+    # journal_mode is persistent in the db file; the rest are per-connection
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA mmap_size=268435456;")
+    conn.execute("PRAGMA cache_size=-20000;")
+
+    return conn
+
+
+@contextmanager
+def get_conn():
+    """
+    Borrow a pooled connection for the duration of a `with` block.
+
+    Raises sqlite3.OperationalError if none is returned to the pool within
+    POOL_TIMEOUT seconds, rather than blocking the caller forever.
+    """
+    try:
+        conn = _POOL.get(timeout=POOL_TIMEOUT)
+    except queue.Empty:
+        raise sqlite3.OperationalError(
+            "Timed out waiting for a pooled database connection"
+        ) from None
+    try:
+        yield conn
+    finally:
+        _POOL.put(conn)
 
 
 def init_db():
     conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute("PRAGMA journal_mode=WAL;")
-    
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS tickets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             game_type TEXT,
             draw_date TEXT,
             numbers TEXT,
+            numbers_mask INTEGER,
+            numbers_text TEXT,
             is_system_bet INTEGER,
             prize_results TEXT,
             is_winner INTEGER,
@@ -33,71 +160,94 @@ def init_db():
         )
     """)
 
-    conn.commit()
-    conn.close()
-
-
-def save_ticket(ticket, prize_results, is_winner):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO tickets (
-            game_type,
-            draw_date,
-            numbers,
-            is_system_bet,
-            prize_results,
-            is_winner,
-            created_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (
-        ticket.game_type,
-        ticket.draw_date,
-        json.dumps(ticket.numbers),
-        int(ticket.is_system_bet),
-        json.dumps(prize_results),
-        int(is_winner),
-        datetime.utcnow().isoformat()
-    ))
+    # Databases created before the compact number columns existed
+    columns = {row["name"] for row in cursor.execute("PRAGMA table_info(tickets)")}
+    for column, column_type in (("numbers_mask", "INTEGER"), ("numbers_text", "TEXT")):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE tickets ADD COLUMN {column} {column_type}")
 
     conn.commit()
-    conn.close()
 
+    # Fill the pool once; re-running init_db() must not block on a full queue
+    if _POOL.empty():
+        _POOL.put(conn)
+        for _ in range(POOL_SIZE - 1):
+            _POOL.put(get_connection())
+    else:
+        conn.close()
 
-def get_all_tickets():
-    conn = get_connection()
-    cursor = conn.cursor()
 
-    cursor.execute("""
-        SELECT
-            id,
-            game_type,
-            draw_date,
-            numbers,
-            is_system_bet,
-            prize_results,
-            is_winner,
+def save_ticket(ticket, prize_results, is_winner):
+    save_tickets([(ticket, prize_results, is_winner)])
+
+
+def save_tickets(items):
+    """
+    Insert many (ticket, prize_results, is_winner) entries in one transaction.
+    """
+    created_at = _UTCNOW().isoformat()
+
+    rows = [
+        (
+            ticket.game_type,
+            ticket.draw_date,
+            *_encode_numbers(ticket),
+            int(ticket.is_system_bet),
+            _dumps(prize_results),
+            int(is_winner),
             created_at
-        FROM tickets
-        ORDER BY created_at DESC
-    """)
-
-    rows = cursor.fetchall()
-    conn.close()
-
-    tickets = []
-
-    for row in rows:
-        tickets.append({
-            "id": row[0],
-            "game_type": row[1],
-            "draw_date": row[2],
-            "numbers": json.loads(row[3]),
-            "is_system_bet": bool(row[4]),
-            "prize_results": json.loads(row[5]),
-            "is_winner": bool(row[6]),
-            "created_at": row[7]
-        })
-
-    return tickets
+        )
+        for ticket, prize_results, is_winner in items
+    ]
+
+    with get_conn() as conn:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(_INSERT_SQL, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def get_all_tickets(limit=None, after_id=None):
+    """
+    Yield saved tickets newest first, fetching rows in pages so the full
+    history is never held in memory at once.
+
+    `after_id` is a keyset cursor: only tickets older than that id are
+    returned, so the next page starts from the last id of the previous one.
+    A pooled connection is borrowed for each page and returned before its
+    rows are yielded, so a slow consumer never holds one.
+    """
+    # A negative limit means no limit, as with SQLite's LIMIT
+    remaining = -1 if limit is None else limit
+    before_id = _MAX_ROWID if after_id is None else after_id
+
+    while remaining:
+        page_size = FETCH_SIZE if remaining < 0 else min(FETCH_SIZE, remaining)
+
+        with get_conn() as conn:
+            # id is the rowid, so ORDER BY id DESC walks the table b-tree
+            # backwards instead of sorting; AUTOINCREMENT keeps it in
+            # insertion order.
+            rows = conn.execute(_HISTORY_SQL, (before_id, page_size)).fetchall()
+
+        for row in rows:
+            yield {
+                "id": row["id"],
+                "game_type": row["game_type"],
+                "draw_date": row["draw_date"],
+                "numbers": _decode_numbers(row),
+                "is_system_bet": bool(row["is_system_bet"]),
+                "prize_results": _loads(row["prize_results"]),
+                "is_winner": bool(row["is_winner"]),
+                "created_at": row["created_at"]
+            }
+
+        if len(rows) < page_size:
+            break
+
+        before_id = rows[-1]["id"]
+        if remaining > 0:
+            remaining -= len(rows)
@@ -1,10 +1,19 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import math
 import os
+from functools import lru_cache
+import shutil
+import uuid
+from typing import Optional
+
+import orjson
 
 from backend.models.ticket import Ticket
-from backend.services.result_checker import ResultChecker
+from backend.services.result_checker import ResultChecker, pack_combos, warm_up
 from backend.db.database import init_db, save_ticket, get_all_tickets
 
 from backend.services.ocr_service import (
@@ -24,7 +33,20 @@ from backend.services.winning_number_service import (
 # -------------------------------------------------
 # App setup
 # -------------------------------------------------
-app = FastAPI(title="Lottery Ticket Application")
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson. Defined here rather than imported from
+    fastapi.responses, where newer FastAPI releases deprecate it.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+app = FastAPI(
+    title="Lottery Ticket Application",
+    default_response_class=ORJSONResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,40 +57,113 @@ app.add_middleware(
 )
 
 init_db()
+warm_up()
 
 UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+SAVE_UPLOADS = os.environ.get("SAVE_UPLOADS") == "1"
+
+if SAVE_UPLOADS:
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # -------------------------------------------------
 # Helper: unified winning number fetch
 # -------------------------------------------------
+# Results for a past draw never change, so lookups are cached per draw date.
+# Cached values are shared between requests and must not be mutated; lists
+# are converted to tuples to make that hard to do by accident.
+@lru_cache(maxsize=2048)
+def _toto_cached(draw_date: str):
+    numbers = get_toto_winning_numbers(draw_date)
+    return tuple(numbers) if numbers else None
+
+
+@lru_cache(maxsize=2048)
+def _fourd_cached(draw_date: str):
+    results = get_fourd_winning_numbers(draw_date)
+    if not results:
+        return None
+    return {
+        category: tuple(value) if isinstance(value, list) else value
+        for category, value in results.items()
+    }
+
+
+@lru_cache(maxsize=2048)
+def _fourd_category_map(draw_date: str):
+    """
+    Map each winning 4D number of a draw to its prize category.
+    """
+    results = _fourd_cached(draw_date)
+    if not results:
+        return None
+
+    # Lower prizes are added first so a higher prize wins if a number repeats
+    category_map = {}
+    for category in ("consolation", "starter"):
+        for number in results[category]:
+            category_map[number] = category
+    for category in ("third", "second", "first"):
+        category_map[results[category]] = category
+
+    return category_map
+
+
 def get_winning_numbers(game_type: str, draw_date: str):
     if game_type == "TOTO":
-        return get_toto_winning_numbers(draw_date)
+        return _toto_cached(draw_date)
     elif game_type == "4D":
-        return get_fourd_winning_numbers(draw_date)
+        return _fourd_cached(draw_date)
     return None
 
+# -------------------------------------------------
+# Helper: score every combination of a system bet
+# -------------------------------------------------
+def score_system_bet(checker: ResultChecker, ticket: Ticket):
+    combos = pack_combos(
+        ticket.expand_combinations(),
+        math.comb(len(ticket.numbers), 6)
+    )
+    return checker.check_combinations_bulk(combos)
+
+# -------------------------------------------------
+# Helper: keep a debug copy of an upload
+# -------------------------------------------------
+def save_upload_copy(source, file_path: str):
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer, length=1024 * 1024)
+    source.seek(0)
+
 # -------------------------------------------------
 # OCR ticket upload endpoint
 # -------------------------------------------------
 @app.post("/upload-image-ticket")
-def upload_image_ticket(file: UploadFile = File(...)):
+async def upload_image_ticket(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    wait_for_save: bool = False
+):
 
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Uploaded file must be an image")
 
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+    # Uploads are OCR'd straight from the request body; keeping a copy on disk
+    # is only useful when debugging OCR on real tickets.
+    if SAVE_UPLOADS:
+        # basename() drops any client-supplied directories; the uuid prefix keeps
+        # uploads with the same name from overwriting each other
+        filename = f"{uuid.uuid4().hex}_{os.path.basename(file.filename or 'upload')}"
+        file_path = os.path.join(UPLOAD_DIR, filename)
 
-    try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(file.file.read())
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to save uploaded image")
+        try:
+            await asyncio.to_thread(save_upload_copy, file.file, file_path)
+        except Exception:
+            raise HTTPException(status_code=500, detail="Failed to save uploaded image")
 
     # ---------------- OCR ----------------
+    # Tesseract blocks for hundreds of ms, so it runs in a worker thread to
+    # keep the event loop free for other requests.
     try:
-        raw_text = extract_text(file_path)
+        raw_text = await asyncio.to_thread(extract_text, file.file)
         extracted_numbers = extract_numbers_from_text(raw_text)
 
         game_type = classify_game_type(raw_text, extracted_numbers)
@@ -107,32 +202,31 @@ def upload_image_ticket(file: UploadFile = File(...)):
     # ---------------- Prize checking ----------------
     if game_type == "TOTO":
         checker = ResultChecker(winning_numbers)
-        prize_results = checker.check_combinations(ticket.expand_combinations())
+        if ticket.is_system_bet:
+            # Large system bets take a while to score (and the first call
+            # JIT-compiles the numba kernel), so keep it off the event loop
+            prize_results = await asyncio.to_thread(score_system_bet, checker, ticket)
+        else:
+            prize_results = checker.check_combinations(ticket.expand_combinations())
         is_winner = any(count > 0 for count in prize_results.values())
 
     elif game_type == "4D":
         user_number = numbers[0]
-        prize_category = None
-
-        if user_number == winning_numbers["first"]:
-            prize_category = "first"
-        elif user_number == winning_numbers["second"]:
-            prize_category = "second"
-        elif user_number == winning_numbers["third"]:
-            prize_category = "third"
-        elif user_number in winning_numbers["starter"]:
-            prize_category = "starter"
-        elif user_number in winning_numbers["consolation"]:
-            prize_category = "consolation"
+        prize_category = _fourd_category_map(draw_date).get(user_number)
 
         is_winner = prize_category is not None
         prize_results = {"prize_category": prize_category}
 
     # ---------------- Save ----------------
-    try:
-        save_ticket(ticket, prize_results, is_winner)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to save ticket")
+    # The response does not depend on the insert, so by default it runs after
+    # the response is sent; ?wait_for_save=true keeps the old durable behaviour.
+    if wait_for_save:
+        try:
+            await asyncio.to_thread(save_ticket, ticket, prize_results, is_winner)
+        except Exception:
+            raise HTTPException(status_code=500, detail="Failed to save ticket")
+    else:
+        background_tasks.add_task(save_ticket, ticket, prize_results, is_winner)
 
     # ---------------- Response ----------------
     return {
@@ -148,6 +242,33 @@ def upload_image_ticket(file: UploadFile = File(...)):
 # History endpoint
 # -------------------------------------------------
 @app.get("/history")
-def get_ticket_history():
-    tickets = get_all_tickets()
-    return {"count": len(tickets), "tickets": tickets}
\ No newline at end of file
+def get_ticket_history(limit: Optional[int] = None, after_id: Optional[int] = None):
+    tickets = list(get_all_tickets(limit, after_id))
+    return {"count": len(tickets), "tickets": tickets}
+
+
+@app.get("/history/stream")
+def stream_ticket_history(limit: Optional[int] = None, after_id: Optional[int] = None):
+    """
+    Same tickets as /history, streamed as newline-delimited JSON.
+    """
+    lines = (
+        orjson.dumps(ticket) + b"\n"
+        for ticket in get_all_tickets(limit, after_id)
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+# -------------------------------------------------
+# Admin: drop cached winning numbers
+# -------------------------------------------------
+@app.post("/admin/refresh-winning-numbers")
+def refresh_winning_numbers():
+    """
+    Call after new draw results are published so cached lookups
+    (including cached misses for that date) are fetched again.
+    """
+    _toto_cached.cache_clear()
+    _fourd_cached.cache_clear()
+    _fourd_category_map.cache_clear()
+    return {"status": "ok"}
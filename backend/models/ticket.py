@@ -14,12 +14,18 @@ all possible 6-number combinations.
 """
 
 from itertools import combinations
+from typing import Iterator
 
 class Ticket:
+    __slots__ = ("game_type", "draw_date", "numbers", "is_system_bet")
+
     def __init__(self, game_type, draw_date, numbers, is_system_bet=False):
         if game_type not in ["TOTO", "4D"]:
             raise ValueError("Invalid game type")
 
+        # Stored as a tuple so a ticket's numbers can't change after validation
+        numbers = tuple(numbers)
+
         if game_type == "TOTO":
             if len(numbers) <= 6:
                 raise ValueError("TOTO requires at least 6 numbers")
@@ -36,13 +42,16 @@ class Ticket:
         self.is_system_bet = is_system_bet
 
 
-    def expand_combinations(self):
+    def expand_combinations(self) -> Iterator[tuple[int, ...]]:
         """
         For TOTO system bets, expand into all possible 6-number combinations.
         For standard bets or 4D, return the original numbers.
+
+        Combinations are generated lazily, so the result can only be iterated
+        once; use math.comb(len(self.numbers), 6) if the count is needed.
         """
 
         if self.game_type == "TOTO" and self.is_system_bet:
-            return list(combinations(self.numbers, 6))
+            return combinations(self.numbers, 6)
 
-        return [tuple(self.numbers)]
+        return iter([tuple(self.numbers)])
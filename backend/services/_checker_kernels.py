@@ -0,0 +1,74 @@
+"""
+_checker_kernels.py
+
+Numba-compiled kernels for ResultChecker.check_combinations_bulk.
+
+Importing this module requires numba. result_checker.py imports it lazily and
+falls back to the NumPy lookup-table path when numba is not installed.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def _popcount(x):
+    # SWAR popcount; x is a non-negative mask of TOTO numbers (< 2**50)
+    x = x - ((x >> 1) & 0x5555555555555555)
+    x = (x & 0x3333333333333333) + ((x >> 2) & 0x3333333333333333)
+    x = (x + (x >> 4)) & 0x0F0F0F0F0F0F0F0F
+    x = x + (x >> 8)
+    x = x + (x >> 16)
+    x = x + (x >> 32)
+    return x & 0x7F
+
+
+@njit(cache=True)
+def _combo_mask(combos, i):
+    combo_mask = 0
+    for j in range(combos.shape[1]):
+        combo_mask |= 1 << np.int64(combos[i, j])
+    return combo_mask
+
+
+@njit(cache=True)
+def _combo_mask6(combos, i):
+    # TOTO combinations are always 6 numbers; unrolling drops the inner loop
+    return (
+        (1 << np.int64(combos[i, 0])) | (1 << np.int64(combos[i, 1]))
+        | (1 << np.int64(combos[i, 2])) | (1 << np.int64(combos[i, 3]))
+        | (1 << np.int64(combos[i, 4])) | (1 << np.int64(combos[i, 5]))
+    )
+
+
+@njit(parallel=True, cache=True)
+def score(combos, wn_mask):
+    """
+    Count rows of `combos` (N, k) that match 3, 4, 5 and 6 numbers of the
+    winning bitmask `wn_mask` (bit n set for number n).
+    """
+    c3 = 0
+    c4 = 0
+    c5 = 0
+    c6 = 0
+
+    fixed_six = combos.shape[1] == 6
+
+    for i in prange(combos.shape[0]):
+        if fixed_six:
+            combo_mask = _combo_mask6(combos, i)
+        else:
+            combo_mask = _combo_mask(combos, i)
+
+        match_count = _popcount(combo_mask & wn_mask)
+
+        if match_count == 3:
+            c3 += 1
+        elif match_count == 4:
+            c4 += 1
+        elif match_count == 5:
+            c5 += 1
+        elif match_count == 6:
+            c6 += 1
+
+    return c3, c4, c5, c6
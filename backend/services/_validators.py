@@ -0,0 +1,87 @@
+"""
+_validators.py
+
+Validation of OCR-extracted TOTO and 4D numbers, split out of ocr_service.py
+so it can be compiled to a C extension with mypyc:
+
+    cd backend/services && mypyc _validators.py
+
+The compiled module is picked up automatically in place of this file; without
+it the plain Python version is used. Keep this module fully type-annotated
+and free of imports mypyc cannot compile.
+"""
+
+from typing import Any
+
+
+def validate_toto_numbers(numbers: list[Any]) -> list[int]:
+    """
+    Validate and clean OCR-extracted TOTO numbers.
+    """
+
+    # One pass: convert, range-check and de-duplicate. Valid numbers are
+    # 1..49, so a single int with bit n set tracks which have been seen.
+    seen = 0
+    unique: list[int] = []
+
+    for value in numbers:
+        try:
+            n = int(value)
+        except (ValueError, TypeError) as e:
+            raise ValueError("Input list contains non-numeric values.") from e
+
+        if not 1 <= n <= 49:
+            continue
+
+        bit = 1 << n
+        if seen & bit:
+            continue
+
+        seen |= bit
+        unique.append(n)
+
+    if len(unique) <= 6:
+        raise ValueError(f"Invalid TOTO ticket: expected exactly 6 numbers, found {len(unique)}")
+
+    return unique #[:6]
+
+
+def validate_4d_number(extracted_numbers: list[int]) -> str:
+    """
+    Robust 4D validation:
+    - Accepts 4-digit grouped numbers (4109)
+    - Accepts spaced digits (4 1 0 9)
+    - Accepts mixed (410 9)
+    - Ignores draw date / year values
+    """
+
+    # One pass sorts each number into the buckets the cases below check,
+    # skipping obvious years
+    four_digit: list[int] = []
+    single_digits: list[int] = []
+    short_numbers: list[str] = []
+
+    for n in extracted_numbers:
+        if 1900 <= n <= 2100:
+            continue
+        if 1000 <= n <= 9999:
+            four_digit.append(n)
+        elif 0 <= n <= 999:
+            short_numbers.append(str(n))
+            if n <= 9:
+                single_digits.append(n)
+
+    # Case 1: exactly one proper 4-digit number
+    if len(four_digit) == 1:
+        return str(four_digit[0]).zfill(4)
+
+    # Case 2: spaced digits → 4 single digits
+    if len(single_digits) == 4:
+        return "".join(str(d) for d in single_digits)
+
+    # Case 3: mixed split (e.g. 410 + 9)
+    combined = "".join(short_numbers)
+    if len(combined) == 4 and combined.isdigit():
+        return combined
+
+    raise ValueError("Invalid 4D ticket format")
@@ -8,25 +8,168 @@ This file contains helper functions to:
 - Extract raw OCR text from an image
 - Extract numeric content from OCR text
 - Classify game type (TOTO / 4D)
-- Validate TOTO numbers and 4D numbers
+- Validate TOTO numbers and 4D numbers (implemented in _validators.py)
 - Extract the draw date from OCR text (best-effort)
 """
 
 import pytesseract
 from PIL import Image
 import re
+import io
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime
 
+import numpy as np
+
+from backend.services._validators import validate_toto_numbers, validate_4d_number
+
+logger = logging.getLogger(__name__)
+
+# OPTIONAL: OpenCV cleans up ticket photos before OCR
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# OPTIONAL: tesserocr keeps one Tesseract engine loaded in-process instead of
+# pytesseract starting a tesseract subprocess for every image
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 # OPTIONAL: set path explicitly if needed (Windows)
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
+# Patterns are compiled once at import instead of on every upload.
+# ASCII digits only: stdlib \d would also match e.g. "１２".
+_NUM_RE = re.compile(r"[0-9]+")
+
+# One alternation so the OCR text is scanned once for all date formats
+_DATE_RE = re.compile(
+    r"(?P<iso>\d{4}-\d{2}-\d{2})"       # 2026-01-20
+    r"|(?P<dmy>\d{2}/\d{2}/\d{4})"      # 20/01/2026
+    r"|(?P<dmb>\d{2}\s+[A-Z]{3}\s+\d{4})" # 20 JAN 2026
+)
+
+# strptime format per _DATE_RE group; ISO dates are returned as-is
+_DATE_FORMATS = {
+    "dmy": "%d/%m/%Y",
+    "dmb": "%d %b %Y"
+}
+
+
+# OCR output keyed by a hash of the image bytes, so re-submitting the same
+# photo skips Tesseract. Shared by the worker threads the API runs OCR in.
+_OCR_CACHE_SIZE = 256
+_ocr_cache = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+
+# Page segmentation mode 6 (single uniform block) skips full layout analysis,
+# and OEM 1 runs only the LSTM recogniser
+_OCR_PSM = 6
+_OCR_OEM = 1
+
+# Ticket numbers, game names ("TOTO", "4D") and date separators; restricting
+# the charset prunes the recogniser's output classes
+_OCR_WHITELIST = "0123456789TOD/-"
+
+# The tesserocr handle is not thread-safe, so calls are serialised on a lock
+_tess_api = None
+_tess_lock = threading.Lock()
+
+if tesserocr is not None:
+    try:
+        _tess_api = tesserocr.PyTessBaseAPI(psm=_OCR_PSM, oem=_OCR_OEM)
+    except RuntimeError as e:
+        # e.g. tessdata not found; fall back to the pytesseract subprocess.
+        # Logged at INFO so importing the module stays quiet by default.
+        logger.info("tesserocr unavailable, using pytesseract: %s", e)
+
+
+def _preprocess(image: Image.Image) -> Image.Image:
+    """
+    Upscale small photos, smooth noise and binarise before OCR; clean input
+    lets Tesseract skip most of its own binarisation work.
+    """
+    if cv2 is None:
+        return image
+
+    gray = np.asarray(image.convert("L"))
+    if max(gray.shape) < 1000:
+        gray = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    gray = cv2.bilateralFilter(gray, 5, 75, 75)
+    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    return Image.fromarray(bw)
+
+
+def _tesseract(image: Image.Image, whitelist: str) -> str:
+    """
+    Run Tesseract once; an empty whitelist allows every character.
+    """
+    if _tess_api is not None:
+        with _tess_lock:
+            _tess_api.SetVariable("tessedit_char_whitelist", whitelist)
+            _tess_api.SetImage(image)
+            return _tess_api.GetUTF8Text()
+
+    config = f"--oem {_OCR_OEM} --psm {_OCR_PSM}"
+    if whitelist:
+        config += f" -c tessedit_char_whitelist={whitelist}"
+    return pytesseract.image_to_string(image, config=config)
+
+
+def _run_ocr(image: Image.Image) -> str:
+    image = _preprocess(image)
+    text = _tesseract(image, _OCR_WHITELIST)
+
+    # Month names ("20 JAN 2026") fall outside the whitelist, so re-read the
+    # ticket without it when no draw date came through
+    if extract_draw_date(text) == "UNKNOWN":
+        text = _tesseract(image, "")
+
+    return text
+
 
-def extract_text(image_path: str) -> str:
+def extract_text(image) -> str:
     """
     Extract raw text from an image using OCR.
+
+    Accepts a PIL image, a file path, or a binary file object (such as an
+    upload's spooled file), so callers need not write the image to disk first.
+    Results for paths and file objects are cached by image content.
     """
-    image = Image.open(image_path)
-    text = pytesseract.image_to_string(image)
+    if isinstance(image, Image.Image):
+        return _run_ocr(image)
+
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as f:
+            data = f.read()
+    else:
+        data = image.read()
+
+    key = hashlib.blake2b(data, digest_size=16).digest()
+
+    with _ocr_cache_lock:
+        text = _ocr_cache.get(key)
+        if text is not None:
+            _ocr_cache.move_to_end(key)
+            return text
+
+    text = _run_ocr(Image.open(io.BytesIO(data)))
+
+    with _ocr_cache_lock:
+        _ocr_cache[key] = text
+        if len(_ocr_cache) > _OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+
     return text
 
 
@@ -38,8 +181,7 @@ def extract_numbers_from_text(text: str) -> list[int]:
     """
     Extract all numbers found in OCR text.
     """
-    numbers = re.findall(r"\d+", text)
-    return [int(n) for n in numbers]
+    return [int(n) for n in _NUM_RE.findall(text)]
 
 
 def classify_game_type(raw_text: str, numbers: list[int]) -> str:
@@ -70,62 +212,11 @@ def classify_game_type(raw_text: str, numbers: list[int]) -> str:
         raise ValueError("Unable to determine game type from OCR")
 
 
-def validate_toto_numbers(numbers: list[int]) -> list[int]:
-    """
-    Validate and clean OCR-extracted TOTO numbers.
-    """
-
-    try:
-        numbers = [int(n) for n in numbers]
-    except (ValueError, TypeError) as e:
-        raise ValueError("Input list contains non-numeric values.") from e
-        
-    # Remove invalid ranges
-    valid = [n for n in numbers if 1 <= n <= 49]
-
-    # Remove duplicates while preserving order
-    unique = list(dict.fromkeys(valid))
-
-    if len(unique) <= 6:
-        raise ValueError(f"Invalid TOTO ticket: expected exactly 6 numbers, found {len(unique)}")
-
-    return unique #[:6]
-
-def validate_4d_number(extracted_numbers):
-    """
-    Robust 4D validation:
-    - Accepts 4-digit grouped numbers (4109)
-    - Accepts spaced digits (4 1 0 9)
-    - Accepts mixed (410 9)
-    - Ignores draw date / year values
-    """
-
-    # Remove obvious years
-    cleaned = [
-        n for n in extracted_numbers
-        if not (1900 <= n <= 2100)
-    ]
-
-    # Case 1: exactly one proper 4-digit number
-    four_digit = [n for n in cleaned if 1000 <= n <= 9999]
-    if len(four_digit) == 1:
-        return str(four_digit[0]).zfill(4)
-
-    # Case 2: spaced digits → 4 single digits
-    single_digits = [n for n in cleaned if 0 <= n <= 9]
-    if len(single_digits) == 4:
-        return "".join(str(d) for d in single_digits)
-
-    # Case 3: mixed split (e.g. 410 + 9)
-    short_numbers = [str(n) for n in cleaned if 0 <= n <= 999]
-    combined = "".join(short_numbers)
-    if len(combined) == 4 and combined.isdigit():
-        return combined
-
-    raise ValueError("Invalid 4D ticket format")
-
-
-
+@lru_cache(maxsize=256)
+def _parse_date(date_str: str, fmt: str) -> str:
+    # Most uploads are for the same few recent draws, so strptime's
+    # relatively slow parsing is worth caching
+    return datetime.strptime(date_str, fmt).date().isoformat()
 
 
 def extract_draw_date(raw_text: str) -> str:
@@ -133,23 +224,16 @@ def extract_draw_date(raw_text: str) -> str:
     Best-effort extraction of draw date from OCR text.
     Returns ISO date string or 'UNKNOWN'.
     """
-    patterns = [
-        r"(\d{4}-\d{2}-\d{2})",       # 2026-01-20
-        r"(\d{2}/\d{2}/\d{4})",       # 20/01/2026
-        r"(\d{2}\s+[A-Z]{3}\s+\d{4})" # 20 JAN 2026
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, raw_text.upper())
-        if match:
-            date_str = match.group(1)
-            try:
-                if "-" in date_str:
-                    return date_str
-                if "/" in date_str:
-                    return datetime.strptime(date_str, "%d/%m/%Y").date().isoformat()
-                return datetime.strptime(date_str, "%d %b %Y").date().isoformat()
-            except ValueError:
-                pass
-
-    return "UNKNOWN"
\ No newline at end of file
+    for match in _DATE_RE.finditer(raw_text.upper()):
+        date_str = match.group()
+        fmt = _DATE_FORMATS.get(match.lastgroup)
+
+        if fmt is None:
+            return date_str
+
+        try:
+            return _parse_date(date_str, fmt)
+        except ValueError:
+            pass
+
+    return "UNKNOWN"
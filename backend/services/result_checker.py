@@ -5,29 +5,215 @@ Contains prize-checking logic for TOTO tickets.
 
 Given a set of winning numbers and a list of ticket combinations, this module
 counts how many combinations match 3, 4, 5, or 6 numbers.
+
+TOTO numbers are 1..49, so a combination can also be encoded as a 64-bit
+mask with bit n set for number n; the number of matches is then the popcount
+of (combination mask & winning mask). check_combinations applies this per
+combination.
+
+check_combinations_bulk scores a whole system bet at once. When numba is
+installed, the bitmask/popcount loop in _checker_kernels.py is compiled and
+run across threads. Otherwise NumPy builds every combination's mask one
+column (position) at a time and counts matches with np.bitwise_count. On
+NumPy < 2.0, which lacks bitwise_count, a 50-entry boolean lookup table of
+the winning numbers is indexed with the (N, 6) array and each row summed.
+
+pack_combos narrows combinations to an (N, k) uint8 array before scoring:
+numbers 1..49 fit in one byte, so a 6-number combination takes 6 bytes
+instead of a tuple of six Python ints.
 """
 
+from functools import cached_property, lru_cache
+from itertools import chain
+
+import numpy as np
+
+# Below this many combinations NumPy's per-call overhead outweighs the loop
+BULK_MIN_COMBINATIONS = 64
+
+# np.bitwise_count (vectorised popcount) was added in NumPy 2.0
+_HAS_BITWISE_COUNT = hasattr(np, "bitwise_count")
+
+
+@lru_cache(maxsize=None)
+def _numba_score():
+    """
+    Return the numba scoring kernel, or None if numba is not installed.
+    Imported on first use so startup doesn't pay for loading numba.
+    """
+    try:
+        from backend.services._checker_kernels import score
+    except ImportError:
+        return None
+    return score
+
+
+def warm_up():
+    """
+    Compile (or load from numba's cache) the scoring kernel and start its
+    thread pool. Call once from the main thread at startup: the first call
+    would otherwise stall whichever request hits it, and with the TBB
+    threading layer a pool first started from a worker thread hangs the
+    process at exit.
+    """
+    score = _numba_score()
+    if score is not None:
+        score(np.ones((1, 6), dtype=np.uint8), 0)
+
+
+def _same_width(first, rest, width):
+    # Row boundaries are lost once the numbers are flattened, so check each
+    # row's length on the way in
+    yield first
+    for combo in rest:
+        if len(combo) != width:
+            raise ValueError("All combinations must have the same length")
+        yield combo
+
+
+def pack_combos(combinations, count=None):
+    """
+    Pack equal-length combinations into an (N, k) uint8 array.
+
+    `count` is the number of combinations if known (e.g. math.comb(n, 6) for
+    a system bet); it lets np.fromiter allocate the array once instead of
+    growing it. Iterables with a len() are counted automatically. Raises
+    ValueError if `count` is wrong or the combinations differ in length.
+    """
+    if count is None and hasattr(combinations, "__len__"):
+        count = len(combinations)
+
+    combinations = iter(combinations)
+    first = next(combinations, None)
+    if first is None:
+        if count:
+            raise ValueError(f"Expected {count} combinations, got 0")
+        return np.empty((0, 0), dtype=np.uint8)
+
+    width = len(first)
+    flat = np.fromiter(
+        chain.from_iterable(_same_width(first, combinations, width)),
+        dtype=np.uint8,
+        count=-1 if count is None else count * width
+    )
+
+    # np.fromiter stops at `count` (and raises if the iterator runs out
+    # first), so a hint that is too small would silently drop combinations
+    if count is not None and next(combinations, None) is not None:
+        raise ValueError(f"Expected {count} combinations, got more")
+
+    return flat.reshape(-1, width)
+
 
 class ResultChecker:
     def __init__(self, winning_numbers):
-        self.winning_numbers = set(winning_numbers)
+        self.winning_numbers = frozenset(winning_numbers)
+
+        # A checker is built per upload, so a plain loop rather than sum()
+        # over a generator
+        mask = 0
+        for n in self.winning_numbers:
+            mask |= 1 << n
+        self.winning_mask = mask
+
+    # Checkers for the same draw compare equal, so they can key a cache
+    def __eq__(self, other):
+        if not isinstance(other, ResultChecker):
+            return NotImplemented
+        return self.winning_numbers == other.winning_numbers
+
+    def __hash__(self):
+        return hash(self.winning_numbers)
+
+    @cached_property
+    def winning_lut(self):
+        """
+        Boolean table indexed by number, True for winning numbers. Only the
+        NumPy < 2.0 bulk fallback uses it, so it is built on first access.
+        """
+        lut = np.zeros(50, dtype=np.bool_)
+        lut[list(self.winning_numbers)] = True
+        return lut
 
     def check_combinations(self, combinations):
         """
         Check all combinations and return prize tier counts.
         """
-        prize_counts = {
-            3: 0,
-            4: 0,
-            5: 0,
-            6: 0
-        }
+        # Plain local counters instead of dict updates in the hot loop
+        c3 = c4 = c5 = c6 = 0
+
+        wn_mask = self.winning_mask
 
+        # One AND and a popcount per combination; numbers must be 1..49 so
+        # every mask fits in a machine word.
         for combo in combinations:
-            matched_numbers = set(combo) & self.winning_numbers
-            match_count = len(matched_numbers)
+            if len(combo) == 6:
+                combo_mask = (
+                    (1 << combo[0]) | (1 << combo[1]) | (1 << combo[2])
+                    | (1 << combo[3]) | (1 << combo[4]) | (1 << combo[5])
+                )
+            else:
+                combo_mask = 0
+                for n in combo:
+                    combo_mask |= 1 << n
+
+            match_count = (combo_mask & wn_mask).bit_count()
+
+            if match_count == 3:
+                c3 += 1
+            elif match_count == 4:
+                c4 += 1
+            elif match_count == 5:
+                c5 += 1
+            elif match_count == 6:
+                c6 += 1
 
-            if match_count >= 3:
-                prize_counts[match_count] += 1
+        return {
+            3: c3,
+            4: c4,
+            5: c5,
+            6: c6
+        }
+
+    def check_combinations_bulk(self, combinations):
+        """
+        Vectorised check_combinations for large system bets.
+
+        Accepts an (N, k) integer ndarray of numbers in 1..49 (see
+        pack_combos), or any iterable of equal-length combinations. Small
+        inputs use the scalar loop.
+        """
+        if isinstance(combinations, np.ndarray):
+            combos = combinations
+        else:
+            combos = pack_combos(combinations)
 
-        return prize_counts
+        if len(combos) < BULK_MIN_COMBINATIONS:
+            return self.check_combinations(combos.tolist())
+
+        score = _numba_score()
+        if score is not None:
+            c3, c4, c5, c6 = score(combos, self.winning_mask)
+            return {3: int(c3), 4: int(c4), 5: int(c5), 6: int(c6)}
+
+        if _HAS_BITWISE_COUNT:
+            # Column-per-position (SoA) layout: each shift and OR is one
+            # contiguous pass that NumPy runs with SIMD, then a vectorised
+            # popcount; about twice as fast as gathering from the lookup table.
+            columns = np.ascontiguousarray(combos.T, dtype=np.uint64)
+            one = np.uint64(1)
+            masks = one << columns[0]
+            for column in columns[1:]:
+                masks |= one << column
+            match_counts = np.bitwise_count(masks & np.uint64(self.winning_mask))
+        else:
+            match_counts = self.winning_lut[combos].sum(axis=1, dtype=np.int8)
+
+        hist = np.bincount(match_counts, minlength=7)
+
+        return {
+            3: int(hist[3]),
+            4: int(hist[4]),
+            5: int(hist[5]),
+            6: int(hist[6])
+        }
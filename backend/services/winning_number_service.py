@@ -1,18 +1,24 @@
-def get_toto_winning_numbers(draw_date: str):
-    if draw_date == "2026-01-20":
-        return [1, 5, 12, 23, 34, 45]
-    else:
-        return None
-
+# Winning numbers per draw date. Lookups are a single dict access and every
+# call hands back the same shared object: prize lists are tuples, and callers
+# that need to modify a result must copy it first (e.g. dict(results)).
+_TOTO_RESULTS = {
+    "2026-01-20": (1, 5, 12, 23, 34, 45)
+}
 
-def get_fourd_winning_numbers(draw_date: str):
-    if draw_date == "2026-01-20":
-        return {
+_4D_RESULTS = {
+    "2026-01-20": {
         "first": "4109",
         "second": "1234",
         "third": "5678",
-        "starter": ["0001", "1111"],
-        "consolation": ["2222", "3333"]
-        }   
-    else:
-        return None
\ No newline at end of file
+        "starter": ("0001", "1111"),
+        "consolation": ("2222", "3333")
+    }
+}
+
+
+def get_toto_winning_numbers(draw_date: str):
+    return _TOTO_RESULTS.get(draw_date)
+
+
+def get_fourd_winning_numbers(draw_date: str):
+    return _4D_RESULTS.get(draw_date)